@@ -6,15 +6,22 @@ Mantém as variáveis PPLX_API_KEY e PPLX_MODEL intactas para uso futuro.
 
 import os
 import json
+import sys
 import time
 from typing import Dict, Any, Optional
-import google.generativeai as genai
 from pathlib import Path
 
+# Permite reutilizar os módulos de src/ sem PYTHONPATH
+_SRC = str(Path(__file__).resolve().parent / "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
+
 # Configuração - usa variáveis de ambiente para Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")  # padrão: gemini-1.5-pro (modelos disponíveis: gemini-pro, gemini-1.5-pro, gemini-1.5-flash)
 STUDY_IDS = os.getenv("STUDY_IDS")  # IDs dos estudos a processar (separados por vírgula ou espaço)
+INPUT_FILE = "data/interim/studies.jsonl"
+OUTPUT_FILE = "data/processed/llm_outputs_gemini.jsonl"
 
 # As variáveis PPLX são mantidas intactas (não usadas aqui)
 # PPLX_API_KEY = os.getenv("PPLX_API_KEY")  # mantida para uso futuro
@@ -110,6 +117,8 @@ def list_available_models():
         print("ERRO: GEMINI_API_KEY não está definida para listar modelos.")
         return []
     
+    import google.generativeai as genai
+
     try:
         genai.configure(api_key=GEMINI_API_KEY)
         models = genai.list_models()
@@ -127,7 +136,9 @@ def call_gemini_api(prompt: str, max_retries: int = 3) -> Optional[str]:
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY não está definida. Configure a variável de ambiente.")
     
-    # Configura o cliente Gemini
+    # Configura o cliente Gemini (import tardio: o SDK é pesado)
+    import google.generativeai as genai
+
     genai.configure(api_key=GEMINI_API_KEY)
     
     # Verifica se o modelo existe antes de tentar usar
@@ -213,33 +224,22 @@ def process_study(study: Dict[str, Any], codebook: str) -> Optional[Dict]:
     
     return result
 
-def main():
-    """Função principal."""
+def main(study_ids: Optional[str] = None) -> int:
+    """Função principal; devolve 1 se nada pôde ser processado."""
+    study_ids = study_ids if study_ids is not None else STUDY_IDS
     # Verifica se a API key está configurada
     if not GEMINI_API_KEY:
         print("ERRO: GEMINI_API_KEY não está definida!")
         print("Configure com: export GEMINI_API_KEY='sua_chave_aqui'")
-        return
+        return 1
     
     print(f"Usando modelo: {GEMINI_MODEL}")
     print(f"PPLX_API_KEY mantida: {'Sim' if os.getenv('PPLX_API_KEY') else 'Não (opcional)'}")
     print(f"PPLX_MODEL mantida: {os.getenv('PPLX_MODEL', 'Não definida (opcional)')}")
-    if STUDY_IDS:
-        print(f"STUDY_IDS filtrado: {STUDY_IDS}")
+    if study_ids:
+        print(f"STUDY_IDS filtrado: {study_ids}")
     else:
         print("STUDY_IDS: Não definido (processando todos os estudos)")
-    
-    # Verifica se o modelo está disponível
-    print("\nVerificando modelo disponível...")
-    available_models = list_available_models()
-    if available_models:
-        if GEMINI_MODEL not in available_models:
-            print(f"AVISO: Modelo '{GEMINI_MODEL}' pode não estar disponível.")
-            print(f"Modelos disponíveis: {', '.join(available_models[:5])}")
-            if len(available_models) > 5:
-                print(f"... e mais {len(available_models) - 5} modelos")
-        else:
-            print(f"✓ Modelo '{GEMINI_MODEL}' está disponível")
     print("-" * 50)
     
     # Carrega codebook
@@ -248,19 +248,24 @@ def main():
         print("AVISO: Codebook não encontrado. Continuando sem ele...")
     
     # Configuração de arquivos
-    input_file = "data/interim/studies.jsonl"
-    output_file = "data/processed/llm_outputs_gemini.jsonl"
+    input_file = INPUT_FILE
+    output_file = OUTPUT_FILE
     
     # Cria diretório de saída se não existir
     Path(output_file).parent.mkdir(parents=True, exist_ok=True)
     
+    # Os resultados são anexados: garante que a última linha existente termina em \n
+    from llm_codec import ensure_trailing_newline
+
+    ensure_trailing_newline(Path(output_file))
+    
     # Carrega estudos
     print(f"Carregando estudos de {input_file}...")
     all_studies = load_studies(input_file)
     print(f"Encontrados {len(all_studies)} estudos no arquivo")
     
     # Filtra estudos se STUDY_IDS estiver definido
-    studies = filter_studies_by_ids(all_studies, STUDY_IDS)
+    studies = filter_studies_by_ids(all_studies, study_ids)
     print(f"Estudos a processar: {len(studies)}")
     
     # Processa cada estudo
@@ -282,7 +287,8 @@ def main():
     print(f"Processamento concluído!")
     print(f"Resultados salvos em: {output_file}")
     print(f"Estudos processados com sucesso: {len(results)}/{len(studies)}")
+    return 1 if studies and not results else 0
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
 
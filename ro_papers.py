@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+CLI única do pipeline (``ro-papers``).
+
+Cada subcomando importa os módulos de provider (openai, google.generativeai)
+e de dataframes (pandas, numpy) apenas quando é executado, para que o
+arranque e o ``--help`` fiquem rápidos. Este módulo só pode importar a
+biblioteca padrão no nível do módulo.
+
+Uso: python ro_papers.py <subcomando> [opções]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# Dispensa o PYTHONPATH=src:. exigido pelos scripts individuais
+for _path in (ROOT / "src", ROOT):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+HEAVY_MODULES = ("google.generativeai", "openai", "pandas", "numpy", "tqdm", "pydantic")
+
+# Subcomandos na ordem do pipeline, com a ajuda exibida em ``--help``
+_SUBCOMMAND_HELP = {
+    "ingest": (
+        "Extrai os PDFs para data/interim/studies.jsonl "
+        "(requer src/parse_pdfs.py, ausente do repositório)."
+    ),
+    "code": "Codifica os estudos com o LLM.",
+    "recode": "Recodifica estudos, substituindo os outputs anteriores.",
+    "compile": "Compila outputs JSONL para XLSX.",
+    "agreement": "Calcula a concordância entre runs/modelos.",
+    "validate": "Valida outputs JSONL contra o codebook.",
+    "models": "Lista os modelos Gemini disponíveis.",
+    "bench": "Mede o tempo de arranque da CLI.",
+}
+SUBCOMMANDS = tuple(_SUBCOMMAND_HELP)
+
+
+def keep_latest_outputs(path: Path) -> None:
+    """Reescreve um JSONL de outputs mantendo só a última codificação de cada estudo.
+
+    O arquivo inteiro é lido e validado antes de qualquer escrita, e o novo
+    conteúdo substitui o antigo de forma atômica; uma linha inválida gera
+    ``ValueError`` e deixa o arquivo intacto. Registros sem ``study_id`` não
+    podem ser deduplicados e são mantidos na sua posição original.
+    """
+    lines: list[str] = []
+    position: dict[str, int] = {}
+    with path.open(encoding="utf-8") as fin:
+        for lineno, line in enumerate(fin, 1):
+            if not line.strip():
+                continue
+            try:
+                study_id = json.loads(line).get("study_id")
+            except (json.JSONDecodeError, AttributeError) as exc:
+                raise ValueError(f"{path}:{lineno}: linha JSONL inválida ({exc})") from exc
+            if study_id and study_id in position:
+                lines[position[study_id]] = line.rstrip("\n")
+                continue
+            if study_id:
+                position[study_id] = len(lines)
+            lines.append(line.rstrip("\n"))
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fout:
+            for line in lines:
+                fout.write(line + "\n")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    try:
+        from parse_pdfs import main as parse_main
+    except ModuleNotFoundError as exc:
+        if exc.name != "parse_pdfs":
+            raise
+        print("ERRO: src/parse_pdfs.py não faz parte deste repositório; adicione-o para extrair os PDFs.")
+        return 1
+    parse_main()
+    return 0
+
+
+def _run_provider(provider: str, studies: str | None, append: bool = False) -> tuple[int, Path]:
+    """Executa a codificação e devolve (status, arquivo de outputs)."""
+    if provider == "gemini":
+        import process_studies_gemini
+
+        return process_studies_gemini.main(studies), Path(process_studies_gemini.OUTPUT_FILE)
+
+    import llm_codec
+    from config import settings
+
+    try:
+        llm_codec.main(llm_codec.parse_study_ids(studies), append=append)
+    except RuntimeError as exc:
+        print(f"ERRO: {exc}")
+        return 1, settings.llm_outputs_jsonl
+    return 0, settings.llm_outputs_jsonl
+
+
+def cmd_code(args: argparse.Namespace) -> int:
+    status, _ = _run_provider(args.provider, args.studies)
+    return status
+
+
+def cmd_recode(args: argparse.Namespace) -> int:
+    status, output = _run_provider(args.provider, args.studies, append=True)
+    if status:
+        return status
+    if not output.exists():
+        print(f"ERRO: nenhum output gravado em {output}")
+        return 1
+    try:
+        keep_latest_outputs(output)
+    except ValueError as exc:
+        print(f"ERRO: {exc}")
+        return 1
+    print(f"✓ Recodificação gravada em {output}")
+    return 0
+
+
+def cmd_compile(args: argparse.Namespace) -> int:
+    import compile_outputs
+
+    compile_outputs.compile_file(Path(args.input) if args.input else None)
+    return 0
+
+
+def cmd_agreement(args: argparse.Namespace) -> int:
+    import agreement
+
+    names = [n.strip() for n in args.names.split(",")] if args.names else None
+    try:
+        agreement.write_report([Path(p) for p in args.inputs], names, args.output)
+    except ValueError as exc:
+        print(f"ERRO: {exc}")
+        return 1
+    return 0
+
+
+def cmd_validate(args: argparse.Namespace) -> int:
+    import codebook
+
+    return codebook.validate_files(args.inputs, args.output, args.verbose)
+
+
+def cmd_models(args: argparse.Namespace) -> int:
+    import list_gemini_models
+
+    return list_gemini_models.main()
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    """Mede o arranque da CLI num interpretador novo e verifica imports pesados."""
+    import statistics
+    import subprocess
+    import time
+
+    probe = (
+        "import sys, ro_papers; ro_papers.build_parser(); "
+        "print(','.join(m for m in ro_papers.HEAVY_MODULES if m in sys.modules))"
+    )
+
+    def timed(code: str) -> tuple[float, str]:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        return time.perf_counter() - start, result.stdout.strip()
+
+    baseline = statistics.median(timed("pass")[0] for _ in range(args.repeat))
+    runs = [timed(probe) for _ in range(args.repeat)]
+    startup = statistics.median(t for t, _ in runs)
+    loaded = sorted({m for _, out in runs for m in out.split(",") if m})
+    overhead = startup - baseline
+
+    print(f"Interpretador: {baseline * 1000:.1f} ms")
+    print(f"CLI:           {startup * 1000:.1f} ms (+{overhead * 1000:.1f} ms)")
+    status = 0
+    if loaded:
+        print(f"ERRO: módulos pesados importados no arranque: {', '.join(loaded)}")
+        status = 1
+    if args.max_overhead is not None and overhead * 1000 > args.max_overhead:
+        print(f"ERRO: arranque excede o limite de {args.max_overhead:.0f} ms")
+        status = 1
+    if status == 0:
+        print("✓ Arranque dentro do esperado")
+    return status
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"inteiro inválido: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1 (recebido: {value})")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ro-papers", description="Pipeline de codificação da revisão de literatura."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    parsers = {name: sub.add_parser(name, help=_SUBCOMMAND_HELP[name]) for name in SUBCOMMANDS}
+
+    parsers["ingest"].set_defaults(func=cmd_ingest)
+
+    for name, func in (("code", cmd_code), ("recode", cmd_recode)):
+        p = parsers[name]
+        p.add_argument(
+            "-p", "--provider", choices=("pplx", "gemini"), default="pplx",
+            help="Provider do LLM (padrão: pplx).",
+        )
+        p.add_argument(
+            "-s", "--studies", default=None, required=name == "recode",
+            help="IDs dos estudos, separados por vírgula ou espaço (ou use STUDY_IDS).",
+        )
+        p.set_defaults(func=func)
+
+    # Os padrões ficam com os módulos (config), que só são importados na execução
+    p = parsers["compile"]
+    p.add_argument(
+        "-i", "--input", default=None,
+        help="Arquivo JSONL de entrada (padrão: LLM_OUTPUTS_FILE ou o output do Perplexity).",
+    )
+    p.set_defaults(func=cmd_compile)
+
+    p = parsers["agreement"]
+    p.add_argument("inputs", nargs="+", help="Arquivos JSONL de outputs (um por run).")
+    p.add_argument(
+        "-n", "--names", default=None,
+        help="Nomes dos runs, separados por vírgula (padrão: nome dos arquivos).",
+    )
+    p.add_argument(
+        "-o", "--output", default=None, help="Arquivo XLSX de saída (padrão: outputs/agreement.xlsx)."
+    )
+    p.set_defaults(func=cmd_agreement)
+
+    p = parsers["validate"]
+    p.add_argument(
+        "inputs", nargs="*", help="Arquivos JSONL de outputs (padrão: o output do Perplexity)."
+    )
+    p.add_argument(
+        "-o", "--output", default=None,
+        help="Grava todas as violações num CSV (file, study_id, variable, kind, code).",
+    )
+    p.add_argument(
+        "-v", "--verbose", action="store_true", help="Lista cada violação por estudo e variável."
+    )
+    p.set_defaults(func=cmd_validate)
+
+    parsers["models"].set_defaults(func=cmd_models)
+
+    p = parsers["bench"]
+    p.add_argument(
+        "-r", "--repeat", type=_positive_int, default=5, help="Repetições, no mínimo 1 (padrão: 5)."
+    )
+    p.add_argument(
+        "--max-overhead", type=float, default=None,
+        help="Falha se o arranque exceder o do interpretador em mais de N ms.",
+    )
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,479 @@
+"""
+Concordância entre execuções (runs) e entre modelos da codificação LLM.
+
+Carrega N arquivos JSONL de outputs, resolve as variáveis pelo codebook e
+monta matrizes compactas estudo × variável × run. Para as variáveis
+categóricas e numéricas calcula a concordância percentual, o kappa de Cohen
+(média dos pares de runs), o kappa de Fleiss e o alfa de Krippendorff
+(nominal); famílias múltiplas são tratadas como conjuntos de códigos e
+variáveis de texto livre recebem apenas a taxa de coincidência exata.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from codebook import normalize_code, resolve_variables
+from config import settings
+
+MISSING = -1
+
+
+@dataclass(frozen=True)
+class CodeMatrix:
+    """Códigos categorizados de N runs.
+
+    ``codes[s, v, r]`` é o id global da categoria atribuída pelo run ``r`` à
+    variável ``v`` do estudo ``s`` (ou ``MISSING``). ``category_variable[g]``
+    indica a variável a que pertence a categoria global ``g`` e
+    ``category_values[g]`` o código original (normalizado como texto).
+    """
+
+    study_ids: np.ndarray
+    variables: np.ndarray
+    runs: tuple[str, ...]
+    codes: np.ndarray
+    category_variable: np.ndarray
+    category_values: np.ndarray
+
+
+@dataclass(frozen=True)
+class CodedRuns:
+    """Códigos de N runs já resolvidos contra o codebook.
+
+    ``codes`` tem uma linha por (run, estudo, variável) com as colunas
+    ``study_id``, ``variable`` (nome canônico), ``family`` (variável do
+    codebook; em variáveis múltiplas, sem o sufixo numérico), ``kind``,
+    ``multiple``, ``run`` e ``code``. ``unknown_variables`` conta as grafias
+    que não correspondem a nenhuma variável do codebook.
+    """
+
+    runs: tuple[str, ...]
+    codes: pd.DataFrame
+    unknown_variables: pd.Series
+
+
+def _read_run(path: Path) -> list[tuple[str, object, object]]:
+    """Lê um JSONL e devolve triplas (study_id, variável, código) sem normalizar.
+
+    Se um estudo aparece mais de uma vez (reprocessado em modo append), vale
+    o último registro.
+    """
+    records: dict[str, list] = {}
+    with path.open(encoding="utf-8") as fin:
+        for line in fin:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            study_id = record.get("study_id")
+            if study_id:
+                records[study_id] = record.get("codes") or []
+    return [
+        (study_id, item.get("variable"), item.get("code"))
+        for study_id, items in records.items()
+        for item in items
+    ]
+
+
+def _normalize_column(values: pd.Series, normalize: Callable[[object], object]) -> np.ndarray:
+    """Aplica ``normalize`` apenas aos valores distintos da coluna."""
+    idx, uniques = pd.factorize(values)
+    normalized = np.array([normalize(u) for u in uniques] + [None], dtype=object)
+    return normalized[idx]
+
+
+def default_run_names(paths: list[Path]) -> tuple[str, ...]:
+    """Nomeia os runs pelo nome dos arquivos, desambiguando nomes repetidos.
+
+    Reprocessamentos costumam ter o mesmo nome de arquivo em pastas
+    diferentes: nesses casos o nome inclui a pasta (``backup/llm_outputs``) e,
+    se ainda houver colisão, a posição do run (``llm_outputs#2``).
+    """
+    stems = [Path(p).stem for p in paths]
+    names = [
+        f"{Path(p).parent.name}/{stem}" if stems.count(stem) > 1 else stem
+        for p, stem in zip(paths, stems)
+    ]
+    return tuple(
+        f"{name}#{i}" if names.count(name) > 1 else name for i, name in enumerate(names, 1)
+    )
+
+
+def load_runs(
+    paths: list[Path], names: list[str] | None = None, codebook_path: Path | None = None
+) -> CodedRuns:
+    """Carrega N runs, resolvendo os nomes das variáveis pelo codebook compilado."""
+    runs = tuple(names) if names else default_run_names(paths)
+    if len(runs) != len(paths):
+        raise ValueError(
+            f"O número de nomes ({len(runs)}) deve coincidir com o número de arquivos ({len(paths)})."
+        )
+    if len(set(runs)) != len(runs):
+        raise ValueError(f"Nomes de runs duplicados: {', '.join(runs)}")
+
+    frames = []
+    for run_idx, path in enumerate(paths):
+        frame = pd.DataFrame(_read_run(Path(path)), columns=["study_id", "raw", "code"])
+        frame["run"] = run_idx
+        frames.append(frame)
+    long = pd.concat(frames, ignore_index=True)
+
+    # Grafias distintas são resolvidas uma única vez
+    raw_idx, raw_names = pd.factorize(long["raw"])
+    resolved = resolve_variables(raw_names, codebook_path)
+    matches = [resolved[raw] for raw in raw_names] + [None]
+    known = np.array([m is not None for m in matches])[raw_idx]
+    unknown_variables = long.loc[~known, "raw"].astype(str).value_counts()
+
+    long = long[known].copy()
+    idx = raw_idx[known]
+    long["variable"] = np.array([m[0] if m else None for m in matches], dtype=object)[idx]
+    long["family"] = np.array([m[1].name if m else None for m in matches], dtype=object)[idx]
+    long["kind"] = np.array([m[1].kind if m else None for m in matches], dtype=object)[idx]
+    long["multiple"] = np.array([bool(m and m[1].multiple) for m in matches])[idx]
+    long["code"] = _normalize_column(long["code"], normalize_code)
+    long = long.dropna(subset=["code"]).drop_duplicates(
+        ["run", "study_id", "variable"], keep="last"
+    )
+    return CodedRuns(
+        runs=runs,
+        codes=long.drop(columns="raw").reset_index(drop=True),
+        unknown_variables=unknown_variables,
+    )
+
+
+def build_matrix(codes: pd.DataFrame, runs: tuple[str, ...]) -> CodeMatrix:
+    """Monta a ``CodeMatrix`` a partir de linhas (study_id, variable, run, code)."""
+    study_idx, study_ids = pd.factorize(codes["study_id"], sort=True)
+    var_idx, variables = pd.factorize(codes["variable"], sort=True)
+    code_idx, code_values = pd.factorize(codes["code"])
+    categories, cat_idx = np.unique(
+        var_idx.astype(np.int64) * max(len(code_values), 1) + code_idx, return_inverse=True
+    )
+
+    matrix = np.full((len(study_ids), len(variables), len(runs)), MISSING, dtype=np.int32)
+    matrix[study_idx, var_idx, codes["run"].to_numpy()] = cat_idx
+    return CodeMatrix(
+        study_ids=np.asarray(study_ids, dtype=object),
+        variables=np.asarray(variables, dtype=object),
+        runs=runs,
+        codes=matrix,
+        category_variable=categories // max(len(code_values), 1),
+        category_values=np.asarray(code_values, dtype=object)[categories % max(len(code_values), 1)],
+    )
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _pairwise_cohen(matrix: CodeMatrix) -> np.ndarray:
+    """Kappa de Cohen por variável, como média sobre todos os pares de runs.
+
+    Com dois runs é o kappa de Cohen clássico; com mais, é o kappa de Light.
+    Cada par é vetorizado sobre todos os estudos e variáveis de uma vez.
+    """
+    n_vars = len(matrix.variables)
+    n_cats = len(matrix.category_variable)
+    var_of_cell = np.broadcast_to(np.arange(n_vars), matrix.codes.shape[:2])
+    total = np.zeros(n_vars)
+    pairs = np.zeros(n_vars)
+    for a, b in combinations(range(len(matrix.runs)), 2):
+        x, y = matrix.codes[..., a], matrix.codes[..., b]
+        both = (x != MISSING) & (y != MISSING)
+        x, y, var = x[both], y[both], var_of_cell[both]
+        n = np.bincount(var, minlength=n_vars).astype(float)
+        p_o = _ratio(np.bincount(var, weights=x == y, minlength=n_vars), n)
+        joint = np.bincount(x, minlength=n_cats) * np.bincount(y, minlength=n_cats)
+        p_e = _ratio(np.bincount(matrix.category_variable, weights=joint, minlength=n_vars), n**2)
+        kappa = _ratio(p_o - p_e, 1 - p_e)
+        ok = ~np.isnan(kappa)
+        total[ok] += kappa[ok]
+        pairs[ok] += 1
+    return _ratio(total, pairs)
+
+
+def compute_agreement(matrix: CodeMatrix) -> pd.DataFrame:
+    """Calcula as métricas de concordância por variável.
+
+    Apenas estudos codificados por pelo menos dois runs (itens "pareáveis")
+    entram nas métricas. Concordância percentual é a proporção média de pares
+    de runs concordantes por estudo; Fleiss e Krippendorff usam as contagens
+    estudo × categoria, o que admite runs em falta em alguns estudos.
+    """
+    n_studies, n_vars, _ = matrix.codes.shape
+    n_cats = len(matrix.category_variable)
+
+    # Contagens n_ik (item = estudo × variável, k = categoria global)
+    present = matrix.codes != MISSING
+    item = np.broadcast_to(
+        np.arange(n_studies * n_vars).reshape(n_studies, n_vars, 1), matrix.codes.shape
+    )[present].astype(np.int64)
+    keys, n_ik = np.unique(item * n_cats + matrix.codes[present], return_counts=True)
+    item_k, cat_k = keys // n_cats, keys % n_cats
+    var_k = matrix.category_variable[cat_k]
+
+    n_i = np.bincount(item_k, weights=n_ik, minlength=n_studies * n_vars)
+    pairable = n_i >= 2
+    keep = pairable[item_k]
+    item_k, cat_k, var_k, n_ik = item_k[keep], cat_k[keep], var_k[keep], n_ik[keep].astype(float)
+    n_i_k = n_i[item_k]
+
+    item_var = np.arange(n_studies * n_vars) % n_vars
+    n_items = np.bincount(item_var[pairable], minlength=n_vars)
+    n_ratings = np.bincount(item_var[pairable], weights=n_i[pairable], minlength=n_vars)
+
+    # Concordância observada por item: sum_k n_ik(n_ik-1) / n_i(n_i-1)
+    p_item = np.bincount(
+        var_k, weights=n_ik * (n_ik - 1) / (n_i_k * (n_i_k - 1)), minlength=n_vars
+    )
+    p_bar = _ratio(p_item, n_items)
+
+    # Fleiss: prevalência das categorias no total de classificações
+    n_k = np.bincount(cat_k, weights=n_ik, minlength=n_cats)
+    share = _ratio(n_k, n_ratings[matrix.category_variable])
+    p_e = np.bincount(matrix.category_variable, weights=np.nan_to_num(share) ** 2, minlength=n_vars)
+    fleiss = _ratio(p_bar - p_e, 1 - p_e)
+
+    # Krippendorff (nominal) a partir da matriz de coincidências
+    d_o = _ratio(
+        np.bincount(var_k, weights=n_ik * (n_i_k - n_ik) / (n_i_k - 1), minlength=n_vars),
+        n_ratings,
+    )
+    n_v = n_ratings[matrix.category_variable]
+    d_e = _ratio(
+        np.bincount(matrix.category_variable, weights=n_k * (n_v - n_k), minlength=n_vars),
+        n_ratings * (n_ratings - 1),
+    )
+    alpha = 1 - _ratio(d_o, d_e)
+
+    return pd.DataFrame(
+        {
+            "variable": matrix.variables,
+            "n_studies": n_items,
+            "pct_agreement": 100 * p_bar,
+            "cohen_kappa": _pairwise_cohen(matrix),
+            "fleiss_kappa": fleiss,
+            "krippendorff_alpha": alpha,
+        }
+    )
+
+
+def find_disagreements(matrix: CodeMatrix) -> pd.DataFrame:
+    """Lista as células estudo × variável em que os runs presentes discordam."""
+    present = matrix.codes != MISSING
+    high = np.where(present, matrix.codes, MISSING).max(axis=2)
+    low = np.where(present, matrix.codes, np.iinfo(np.int32).max).min(axis=2)
+    s_idx, v_idx = np.nonzero((present.sum(axis=2) >= 2) & (high != low))
+
+    cells = matrix.codes[s_idx, v_idx]
+    values = np.where(cells != MISSING, matrix.category_values[cells], None)
+    frame = pd.DataFrame(values, columns=list(matrix.runs))
+    frame.insert(0, "variable", matrix.variables[v_idx])
+    frame.insert(0, "study_id", matrix.study_ids[s_idx])
+    return frame
+
+
+def _family_codes(codes: pd.DataFrame) -> pd.DataFrame:
+    """Códigos distintos de cada família múltipla por (run, estudo)."""
+    return codes[codes["multiple"]].drop_duplicates(["run", "study_id", "family", "code"])
+
+
+def collapse_families(codes: pd.DataFrame) -> pd.DataFrame:
+    """Reduz cada família múltipla a um único valor por estudo: o conjunto de códigos.
+
+    O conjunto é representado como texto ordenado (``"1;3;7"``), de modo que
+    ``Name1``/``Name2``/… com os mesmos códigos em outra ordem concordam.
+    """
+    single = codes.loc[~codes["multiple"], ["study_id", "variable", "run", "code"]]
+    keys = ["run", "study_id", "family"]
+    fam = _family_codes(codes)
+    fam = fam.assign(_order=pd.to_numeric(fam["code"], errors="coerce")).sort_values(
+        [*keys, "_order", "code"]
+    )
+    # Concatena os códigos de cada célula de uma vez, sem um groupby por grupo
+    starts = np.flatnonzero(~fam.duplicated(keys).to_numpy())
+    joined = np.add.reduceat((fam["code"] + ";").to_numpy(dtype=object), starts) if len(starts) else []
+    sets = fam.iloc[starts][keys].rename(columns={"family": "variable"})
+    sets["code"] = [value[:-1] for value in joined]
+    return pd.concat([single, sets], ignore_index=True)
+
+
+def family_indicators(codes: pd.DataFrame) -> pd.DataFrame:
+    """Expande as famílias múltiplas categóricas em indicadores 0/1 por código.
+
+    Cada código observado numa família vira a variável ``Família=código``,
+    valendo ``"1"`` se o run o selecionou para o estudo e ``"0"`` caso o run
+    tenha codificado a família sem ele.
+    """
+    fam = _family_codes(codes[codes["kind"] == "categorical"])
+    keys = ["run", "study_id", "family"]
+    cells = fam[keys].drop_duplicates()
+    grid = cells.merge(fam[["family", "code"]].drop_duplicates(), on="family").merge(
+        fam[[*keys, "code"]].assign(hit="1"), on=[*keys, "code"], how="left"
+    )
+    return pd.DataFrame(
+        {
+            "study_id": grid["study_id"],
+            "variable": grid["family"] + "=" + grid["code"],
+            "run": grid["run"],
+            "code": grid["hit"].fillna("0"),
+        }
+    )
+
+
+def family_jaccard(coded: CodedRuns) -> pd.DataFrame:
+    """Concordância de conjuntos por família múltipla categórica.
+
+    ``jaccard`` é a média, sobre pares de runs e estudos codificados por
+    ambos, de |A ∩ B| / |A ∪ B|; ``pct_identical`` é a percentagem desses
+    pares com conjuntos idênticos.
+    """
+    fam = _family_codes(coded.codes[coded.codes["kind"] == "categorical"])
+    s_idx, _ = pd.factorize(fam["study_id"])
+    f_idx, families = pd.factorize(fam["family"], sort=True)
+    c_idx, code_values = pd.factorize(fam["code"])
+    n_fams = len(families)
+
+    member = np.zeros(
+        (s_idx.max(initial=-1) + 1, n_fams, len(code_values), len(coded.runs)), dtype=bool
+    )
+    member[s_idx, f_idx, c_idx, fam["run"].to_numpy()] = True
+    coded_cell = member.any(axis=2)
+
+    jaccard, identical, pairs = np.zeros(n_fams), np.zeros(n_fams), np.zeros(n_fams)
+    for a, b in combinations(range(len(coded.runs)), 2):
+        both = coded_cell[..., a] & coded_cell[..., b]
+        inter = (member[..., a] & member[..., b]).sum(axis=2)
+        union = (member[..., a] | member[..., b]).sum(axis=2)
+        n = both.sum(axis=0)
+        cell_j = np.where(both, _ratio(inter, union), 0.0)
+        ok = n > 0
+        jaccard[ok] += (cell_j.sum(axis=0) / np.maximum(n, 1))[ok]
+        identical[ok] += ((both & (inter == union)).sum(axis=0) / np.maximum(n, 1))[ok]
+        pairs[ok] += 1
+
+    return pd.DataFrame(
+        {
+            "variable": np.asarray(families, dtype=object),
+            "n_studies": (coded_cell.sum(axis=2) >= 2).sum(axis=0),
+            "jaccard": _ratio(jaccard, pairs),
+            "pct_identical": 100 * _ratio(identical, pairs),
+        }
+    )
+
+
+def _agreement_or_empty(rows: pd.DataFrame, runs: tuple[str, ...]) -> pd.DataFrame:
+    if rows.empty:
+        return pd.DataFrame(
+            columns=["variable", "n_studies", "pct_agreement", "cohen_kappa",
+                     "fleiss_kappa", "krippendorff_alpha"]
+        )
+    return compute_agreement(build_matrix(rows, runs))
+
+
+def agreement_report(coded: CodedRuns) -> dict[str, pd.DataFrame]:
+    """Monta as tabelas do relatório de concordância, uma por aba do XLSX.
+
+    - ``agreement``: métricas das variáveis categóricas e numéricas simples e
+      dos indicadores ``Família=código`` das famílias múltiplas;
+    - ``multi_select``: Jaccard por família múltipla;
+    - ``text``: taxa de coincidência exata das variáveis de texto livre, para
+      as quais kappa e alfa não fazem sentido;
+    - ``disagreements``: células estudo × variável não textuais (famílias
+      como conjuntos) em que os runs discordam;
+    - ``unknown_variables``: grafias fora do codebook, ignoradas.
+    """
+    codes = coded.codes
+    is_text = codes["kind"] == "text"
+    columns = ["study_id", "variable", "run", "code"]
+    coded_values = codes[~is_text]
+    rows = pd.concat(
+        [
+            coded_values.loc[~coded_values["multiple"], columns],
+            family_indicators(coded_values),
+        ],
+        ignore_index=True,
+    )
+    cells = collapse_families(coded_values)
+    if cells.empty:
+        disagreements = pd.DataFrame(columns=["study_id", "variable", *coded.runs])
+    else:
+        disagreements = find_disagreements(build_matrix(cells, coded.runs))
+    text = _agreement_or_empty(collapse_families(codes[is_text]), coded.runs)
+    return {
+        "agreement": _agreement_or_empty(rows, coded.runs),
+        "multi_select": family_jaccard(coded),
+        "text": text[["variable", "n_studies", "pct_agreement"]].rename(
+            columns={"pct_agreement": "pct_exact_match"}
+        ),
+        "disagreements": disagreements,
+        "unknown_variables": coded.unknown_variables.rename_axis("variable").reset_index(
+            name="count"
+        ),
+    }
+
+
+def write_report(
+    paths: list[Path], names: list[str] | None = None, output: Path | None = None
+) -> None:
+    """Calcula a concordância entre os runs e grava o relatório XLSX."""
+    print(f"Carregando {len(paths)} runs...")
+    coded = load_runs(paths, names)
+    if len(coded.unknown_variables):
+        print(f"Variáveis fora do codebook ignoradas: {len(coded.unknown_variables)}")
+    report = agreement_report(coded)
+    print(f"Variáveis: {len(report['agreement'])} (famílias múltiplas: {len(report['multi_select'])})")
+    print(f"Células em desacordo: {len(report['disagreements'])}")
+
+    output = Path(output or settings.agreement_xlsx)
+    print(f"Salvando em {output}...")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        for sheet, table in report.items():
+            table.to_excel(writer, sheet_name=sheet, index=False)
+    print("✓ Concordância calculada!")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Calcula a concordância entre runs/modelos de codificação LLM."
+    )
+    parser.add_argument("inputs", nargs="+", help="Arquivos JSONL de outputs (um por run).")
+    parser.add_argument(
+        "-n",
+        "--names",
+        type=str,
+        default=None,
+        help="Nomes dos runs, separados por vírgula (padrão: nome dos arquivos).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=str(settings.agreement_xlsx),
+        help=f"Arquivo XLSX de saída. Padrão: {settings.agreement_xlsx}",
+    )
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.names.split(",")] if args.names else None
+    try:
+        write_report([Path(p) for p in args.inputs], names, Path(args.output))
+    except ValueError as exc:
+        print(f"ERRO: {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,301 @@
+"""
+Codebook compilado e validação em lote dos outputs codificados.
+
+``prompts/codebook.txt`` (texto extraído do PDF) é convertido uma única vez num
+``Codebook`` tipado: variáveis, códigos/labels permitidos e os códigos padrão
+97/98/99, válidos em todas as variáveis. A validação percorre os outputs JSONL
+sem passar cada registro pelo pydantic: nomes de variáveis são resolvidos uma
+vez por grafia distinta e os códigos conferidos num conjunto de pares
+(variável, código) permitidos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from config import settings
+from models import Codebook, CodebookVariable
+
+_HEADER = re.compile(r"([A-Z][A-Za-z]*(?:[_/][A-Z][A-Za-z]*)*)(\d*)…?")
+_CODE = re.compile(r"(\d+|[A-Z]{2,3})\s*=\s*'?(.*?)'?\.?")
+_SPECIAL_CODES = ("97", "98", "99")
+
+
+class Violation(NamedTuple):
+    study_id: str
+    variable: str
+    # unknown_variable | invalid_code | empty_code | duplicate_variable | missing_variable
+    # | invalid_record | invalid_json
+    kind: str
+    code: str | None = None
+
+
+class _Index(NamedTuple):
+    codebook: Codebook
+    by_key: dict[str, CodebookVariable]  # nome normalizado -> variável
+    allowed: frozenset[tuple[str, str]]  # pares (variável, código) válidos
+
+
+def normalize_variable(name: object) -> str | None:
+    """Normaliza grafias equivalentes (``Type_Publication/Study``, ``X_1`` -> ``X1``)."""
+    if not isinstance(name, str) or not name.strip():
+        return None
+    name = name.strip().rstrip("…").strip().replace("/", "_")
+    return re.sub(r"_(\d+)$", r"\1", name)
+
+
+def normalize_code(code: object) -> str | None:
+    """Converte o código para texto comparável; ``None``/vazio conta como ausente."""
+    if code is None:
+        return None
+    if isinstance(code, float) and code.is_integer():
+        return str(int(code))
+    text = " ".join(str(code).split())
+    return text or None
+
+
+def parse_codebook(text: str) -> Codebook:
+    """Converte o texto do codebook num ``Codebook``.
+
+    Cada variável começa numa linha com o seu nome (``Name1``/``Name2…``
+    indica uma variável múltipla numerada) e os códigos são linhas
+    ``N = Label``, cujas continuações são juntadas ao label até uma linha em
+    branco. A seção "Standard values" define os códigos especiais.
+    """
+    blocks: list[dict] = []
+    special: dict[str, str] = {}
+    current: dict | None = None
+    codes: dict[str, str] | None = None
+    last_code: str | None = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("Standard values"):
+            current, codes, last_code = None, special, None
+            continue
+        header = _HEADER.fullmatch(line)
+        if header and current is not None and current["name"] == header.group(1) and header.group(2):
+            current["multiple"] = True
+            continue
+        if header:
+            current = {
+                "name": header.group(1),
+                "multiple": bool(header.group(2)),
+                "codes": {},
+                "description": [],
+            }
+            blocks.append(current)
+            codes, last_code = current["codes"], None
+            continue
+        if codes is None:
+            continue
+        code = _CODE.fullmatch(line)
+        if code:
+            last_code = code.group(1)
+            codes[last_code] = code.group(2).split(" – ")[0].strip()
+        elif not line:
+            last_code = None
+        elif last_code is not None:
+            label = codes[last_code]
+            codes[last_code] = f"{label}{line}" if label.endswith("-") else f"{label} {line}"
+        elif current is not None:
+            current["description"].append(line)
+
+    variables = []
+    for block in blocks:
+        own = {k: v for k, v in block["codes"].items() if k not in _SPECIAL_CODES}
+        description = " ".join(block["description"]).lower()
+        if own:
+            kind = "categorical"
+        elif "(numeric)" in description:
+            kind = "numeric"
+        else:
+            kind = "text"
+        multiple = block["multiple"] or "(multiple" in description
+        variables.append(
+            CodebookVariable(name=block["name"], kind=kind, codes=own, multiple=multiple)
+        )
+    return Codebook(variables=variables, special_codes=special)
+
+
+@lru_cache(maxsize=4)
+def _compile(path: Path, mtime_ns: int) -> _Index:
+    codebook = parse_codebook(path.read_text(encoding="utf-8"))
+    by_key = {normalize_variable(v.name): v for v in codebook.variables}
+    allowed = frozenset(
+        (v.name, code) for v in codebook.variables for code in (*v.codes, *codebook.special_codes)
+    )
+    return _Index(codebook, by_key, allowed)
+
+
+def _index(path: Path | None = None) -> _Index:
+    path = Path(path or settings.codebook_txt).resolve()
+    return _compile(path, path.stat().st_mtime_ns)
+
+
+def load_codebook(path: Path | None = None) -> Codebook:
+    """Carrega o codebook compilado (em cache até o arquivo ser alterado)."""
+    return _index(path).codebook
+
+
+def _resolve(key: str | None, by_key: dict[str, CodebookVariable]) -> tuple[str, CodebookVariable] | None:
+    """Resolve um nome normalizado para (nome canônico, variável) ou ``None``."""
+    if key is None:
+        return None
+    variable = by_key.get(key)
+    if variable is not None and not variable.multiple:
+        return variable.name, variable
+    base, number = re.fullmatch(r"(.*?)(\d*)", key).groups()
+    variable = by_key.get(base)
+    if variable is None or not variable.multiple:
+        return None
+    return f"{variable.name}{number}", variable
+
+
+def resolve_variables(
+    names: Iterable[object], codebook_path: Path | None = None
+) -> dict[object, tuple[str, CodebookVariable] | None]:
+    """Resolve cada grafia de variável para (nome canônico, variável) ou ``None``."""
+    by_key = _index(codebook_path).by_key
+    return {raw: _resolve(normalize_variable(raw), by_key) for raw in names}
+
+
+def validate_records(records: Iterable[dict], codebook_path: Path | None = None) -> list[Violation]:
+    """Valida outputs (dicts ``{"study_id", "codes"}``) contra o codebook."""
+    index = _index(codebook_path)
+    special = frozenset(index.codebook.special_codes)
+    resolved: dict[object, tuple[str, CodebookVariable] | None] = {}
+    violations: list[Violation] = []
+
+    for record in records:
+        study_id = str(record.get("study_id") or "?")
+        seen: set[str] = set()
+        present: set[str] = set()
+        items = record.get("codes") or []
+        if not isinstance(items, list):
+            violations.append(Violation(study_id, "codes", "invalid_record", type(items).__name__))
+            items = []
+        for item in items:
+            if not isinstance(item, dict):
+                violations.append(Violation(study_id, "codes", "invalid_record", str(item)))
+                continue
+            raw = item.get("variable")
+            if raw not in resolved:
+                resolved[raw] = _resolve(normalize_variable(raw), index.by_key)
+            match = resolved[raw]
+            code = normalize_code(item.get("code"))
+            if match is None:
+                violations.append(Violation(study_id, str(raw), "unknown_variable", code))
+                continue
+            name, variable = match
+            if name in seen:
+                violations.append(Violation(study_id, name, "duplicate_variable", code))
+            seen.add(name)
+            present.add(variable.name)
+            if code is None:
+                violations.append(Violation(study_id, name, "empty_code"))
+            elif variable.kind == "categorical":
+                if (variable.name, code) not in index.allowed:
+                    violations.append(Violation(study_id, name, "invalid_code", code))
+            elif variable.kind == "numeric":
+                if not code.isdigit() and code not in special:
+                    violations.append(Violation(study_id, name, "invalid_code", code))
+        # O study_id do próprio registro já identifica o estudo
+        if record.get("study_id"):
+            present.add("Study_ID")
+        violations.extend(
+            Violation(study_id, v.name, "missing_variable")
+            for v in index.codebook.variables
+            if v.name not in present
+        )
+    return violations
+
+
+def validate_file(path: Path, codebook_path: Path | None = None) -> list[Violation]:
+    """Valida um arquivo JSONL de outputs.
+
+    Linhas que não são JSON válido, ou cujo JSON não é um objeto, são
+    reportadas como ``invalid_json`` (com o número da linha em ``study_id``)
+    e a validação continua nas linhas seguintes.
+    """
+    records: list[dict] = []
+    violations: list[Violation] = []
+    with Path(path).open(encoding="utf-8") as fin:
+        for lineno, line in enumerate(fin, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                violations.append(Violation(f"linha {lineno}", "", "invalid_json", exc.msg))
+                continue
+            if not isinstance(record, dict):
+                violations.append(
+                    Violation(f"linha {lineno}", "", "invalid_json", type(record).__name__)
+                )
+                continue
+            records.append(record)
+    return violations + validate_records(records, codebook_path)
+
+
+def validate_files(
+    inputs: list[Path] | None = None, output: Path | None = None, verbose: bool = False
+) -> int:
+    """Valida arquivos JSONL, imprime o resumo e devolve 1 se houver violações."""
+    rows = []
+    for input_file in inputs or [settings.llm_outputs_jsonl]:
+        violations = validate_file(Path(input_file))
+        rows.extend((str(input_file), *v) for v in violations)
+        print(f"{input_file}: {len(violations)} violações")
+        for kind, count in Counter(v.kind for v in violations).most_common():
+            print(f"  {kind}: {count}")
+        if verbose:
+            for v in violations:
+                print(f"    {v.study_id}  {v.variable}  {v.kind}  {v.code or ''}")
+
+    if output:
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("w", encoding="utf-8", newline="") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(["file", *Violation._fields])
+            writer.writerows(rows)
+        print(f"Violações salvas em {output}")
+    return 1 if rows else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Valida outputs do LLM (JSONL) contra o codebook."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=[str(settings.llm_outputs_jsonl)],
+        help=f"Arquivos JSONL de outputs. Padrão: {settings.llm_outputs_jsonl}",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        help="Grava todas as violações num CSV (file, study_id, variable, kind, code).",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Lista cada violação por estudo e variável."
+    )
+    args = parser.parse_args(argv)
+
+    return validate_files(args.inputs, args.output, args.verbose)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,13 +8,14 @@ import argparse
 import json
 import os
 from pathlib import Path
-
-import pandas as pd
-from tqdm import tqdm
+from typing import TYPE_CHECKING
 
 from config import settings
 from models import LLMResponse
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def load_llm_outputs(input_file: Path | None = None) -> list[LLMResponse]:
     """Carrega outputs do LLM do arquivo JSONL."""
@@ -63,6 +64,8 @@ def load_llm_outputs(input_file: Path | None = None) -> list[LLMResponse]:
 
 def compile_to_dataframe(outputs: list[LLMResponse]) -> pd.DataFrame:
     """Converte outputs do LLM para DataFrame."""
+    import pandas as pd
+
     rows = []
     for output in outputs:
         for code in output.codes:
@@ -76,26 +79,9 @@ def compile_to_dataframe(outputs: list[LLMResponse]) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def main() -> None:
-    """Função principal."""
-    parser = argparse.ArgumentParser(
-        description="Compila outputs do LLM (JSONL) para Excel (XLSX)."
-    )
-    parser.add_argument(
-        "-i",
-        "--input",
-        type=str,
-        default=None,
-        help="Caminho para o arquivo JSONL de entrada (ou use variável de ambiente LLM_OUTPUTS_FILE). "
-             f"Padrão: {settings.llm_outputs_jsonl}",
-    )
-    args = parser.parse_args()
-    
-    # Determina arquivo de entrada
-    input_file = None
-    if args.input:
-        input_file = Path(args.input)
-    else:
+def compile_file(input_file: Path | None = None) -> None:
+    """Compila o JSONL de outputs (argumento > LLM_OUTPUTS_FILE > padrão) para XLSX."""
+    if input_file is None:
         env_file = os.getenv("LLM_OUTPUTS_FILE")
         if env_file:
             input_file = Path(env_file)
@@ -116,6 +102,23 @@ def main() -> None:
     print("✓ Compilação concluída!")
 
 
+def main(argv: list[str] | None = None) -> None:
+    """Função principal."""
+    parser = argparse.ArgumentParser(
+        description="Compila outputs do LLM (JSONL) para Excel (XLSX)."
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        default=None,
+        help="Caminho para o arquivo JSONL de entrada (ou use variável de ambiente LLM_OUTPUTS_FILE). "
+             f"Padrão: {settings.llm_outputs_jsonl}",
+    )
+    args = parser.parse_args(argv)
+    compile_file(Path(args.input) if args.input else None)
+
+
 if __name__ == "__main__":
     main()
 
@@ -17,6 +17,7 @@ class Settings(BaseModel):
     studies_jsonl: Path = Path("data/interim/studies.jsonl")
     llm_outputs_jsonl: Path = Path("data/processed/llm_outputs.jsonl")
     xlxs_output: Path = Path("outputs/SLR_coded.xlsx")
+    agreement_xlsx: Path = Path("outputs/agreement.xlsx")
     model: str = "llama-3.1-sonar-large-128k-online"
     perplexity_base_url: str = "https://api.perplexity.ai"
 
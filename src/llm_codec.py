@@ -8,21 +8,42 @@ import json
 import os
 import time
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
-from openai import OpenAI
 from pydantic import ValidationError
-from tqdm import tqdm
 
 from config import settings
 from models import LLMResponse, StudyRecord
 from prompt_builder import build_prompt, load_prompt_assets
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+def parse_study_ids(value: str | None) -> list[str] | None:
+    """Converte STUDY_IDS (vírgulas e/ou espaços) em lista; ``None`` se vazio."""
+    if not value:
+        return None
+    return [s.strip() for s in value.replace(",", " ").split() if s.strip()] or None
+
+
+def ensure_trailing_newline(path: Path) -> None:
+    """Garante que um JSONL termina em quebra de linha antes de anexar registros."""
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with path.open("rb+") as fh:
+        fh.seek(-1, os.SEEK_END)
+        if fh.read(1) != b"\n":
+            fh.write(b"\n")
+
 
 def configure_client() -> OpenAI:
     api_key = os.getenv("PPLX_API_KEY") or os.getenv("PERPLEXITY_API_KEY")
     if not api_key:
         raise RuntimeError("Defina PPLX_API_KEY (ou PERPLEXITY_API_KEY) no ambiente.")
+    # Import tardio: o SDK só é carregado quando há chamada ao Perplexity
+    from openai import OpenAI
+
     return OpenAI(api_key=api_key, base_url=settings.perplexity_base_url)
 
 
@@ -109,19 +130,22 @@ def call_llm(client: OpenAI, prompt: str) -> str:
             raise
 
 
-def main() -> None:
+def main(study_ids: list[str] | None = None, append: bool = False) -> None:
+    """Codifica os estudos; ``append`` preserva os outputs já existentes."""
+    from tqdm import tqdm
+
     client = configure_client()
     settings.processed_dir.mkdir(parents=True, exist_ok=True)
     codebook_text, rigor_rules = load_prompt_assets()
     
     # Filtra estudos se STUDY_IDS estiver definido
-    study_ids_filter = None
-    study_ids_env = os.getenv("STUDY_IDS")
-    if study_ids_env:
-        study_ids_filter = [s.strip() for s in study_ids_env.replace(",", " ").split() if s.strip()]
+    study_ids_filter = study_ids or parse_study_ids(os.getenv("STUDY_IDS"))
+    if study_ids_filter:
         print(f"Filtrando estudos: {', '.join(study_ids_filter)}")
 
-    with settings.llm_outputs_jsonl.open("w", encoding="utf-8") as fout:
+    if append:
+        ensure_trailing_newline(settings.llm_outputs_jsonl)
+    with settings.llm_outputs_jsonl.open("a" if append else "w", encoding="utf-8") as fout:
         for study in tqdm(yield_studies(settings.studies_jsonl, study_ids_filter), desc="Codificando LLM"):
             prompt = build_prompt(study, codebook_text, rigor_rules)
             raw = call_llm(client, prompt)
@@ -4,7 +4,7 @@ Modelos pydantic para entradas e saídas do pipeline.
 
 from __future__ import annotations
 
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel, Field
 
 
@@ -35,3 +35,17 @@ class LLMResponse(BaseModel):
     study_id: str
     codes: List[VariableCode]
 
+
+class CodebookVariable(BaseModel):
+    name: str  # Nome no codebook; em variáveis múltiplas, sem o sufixo numérico
+    kind: Literal["categorical", "numeric", "text"] = "text"
+    codes: dict[str, str] = Field(default_factory=dict)  # código -> label
+    multiple: bool = False  # Variável numerada (Name1, Name2…)
+
+
+class Codebook(BaseModel):
+    variables: List[CodebookVariable]
+    special_codes: dict[str, str] = Field(
+        default_factory=dict,
+        description="Códigos válidos em todas as variáveis (97, 98, 99).",
+    )
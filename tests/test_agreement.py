@@ -0,0 +1,185 @@
+"""
+Métricas de concordância em entradas pequenas com valores calculados à mão.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from agreement import agreement_report, collapse_families, load_runs  # noqa: E402
+
+CODEBOOK = """\
+Variable Name
+Values and Labels / Description
+Study_ID
+Unique alphanumeric identifier assigned to
+each study (e.g., SLR001).
+Year_Publication
+Year when the publication was published
+(numeric).
+Language
+(Single selection)
+
+1 = English
+2 = Portuguese
+3 = Spanish
+Main_Findings
+Summary of the main findings of the study.
+Engagement1
+Engagement2…
+(Multiple selection)
+
+1 = Voting
+2 = Contacting
+3 = Protest
+Standard values/labels to use across all variables:
+99 = Not Reported – If the information is missing or not discussed.
+98 = Unclear – If the information is presented ambiguously.
+97= Not Applicable – If the variable does not apply to the specific study.
+"""
+
+
+@pytest.fixture
+def codebook_path(tmp_path: Path) -> Path:
+    path = tmp_path / "codebook.txt"
+    path.write_text(CODEBOOK, encoding="utf-8")
+    return path
+
+
+def write_run(path: Path, studies: dict[str, dict[str, object]]) -> Path:
+    """Grava um JSONL de outputs a partir de ``{study_id: {variável: código}}``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as fout:
+        for study_id, codes in studies.items():
+            items = [{"variable": k, "code": v} for k, v in codes.items()]
+            fout.write(json.dumps({"study_id": study_id, "codes": items}) + "\n")
+    return path
+
+
+def language_runs(tmp_path: Path, **runs: dict[str, int]) -> list[Path]:
+    return [
+        write_run(tmp_path / f"{name}.jsonl", {s: {"Language": c} for s, c in codes.items()})
+        for name, codes in runs.items()
+    ]
+
+
+def metrics(report: dict, sheet: str, variable: str) -> dict:
+    table = report[sheet].set_index("variable")
+    return table.loc[variable].to_dict()
+
+
+def test_two_runs_known_values(tmp_path, codebook_path):
+    # p_o = 3/4, p_e(Cohen) = 1/2; Fleiss p_e = (3/8)² + (5/8)²; alfa = 1 - 7·2/30
+    paths = language_runs(
+        tmp_path,
+        a={"S1": 1, "S2": 1, "S3": 2, "S4": 2, "S5": 3},
+        b={"S1": 1, "S2": 2, "S3": 2, "S4": 2},
+    )
+    report = agreement_report(load_runs(paths, codebook_path=codebook_path))
+    row = metrics(report, "agreement", "Language")
+    assert row["n_studies"] == 4  # S5 só foi codificado por um run
+    assert row["pct_agreement"] == pytest.approx(75)
+    assert row["cohen_kappa"] == pytest.approx(0.5)
+    assert row["fleiss_kappa"] == pytest.approx(7 / 15)
+    assert row["krippendorff_alpha"] == pytest.approx(8 / 15)
+
+
+def test_run_missing_studies(tmp_path, codebook_path):
+    # O run c não codificou S4: o estudo continua pareável pelos runs a e b
+    paths = language_runs(
+        tmp_path,
+        a={"S1": 1, "S2": 1, "S3": 2, "S4": 2},
+        b={"S1": 1, "S2": 2, "S3": 2, "S4": 2},
+        c={"S1": 1, "S2": 1, "S3": 2},
+    )
+    report = agreement_report(load_runs(paths, codebook_path=codebook_path))
+    row = metrics(report, "agreement", "Language")
+    assert row["n_studies"] == 4
+    assert row["pct_agreement"] == pytest.approx(100 * 5 / 6)
+    # Pares (a,b), (a,c), (b,c): 0.5, 1 e 0.4
+    assert row["cohen_kappa"] == pytest.approx((0.5 + 1 + 0.4) / 3)
+    assert row["fleiss_kappa"] == pytest.approx(239 / 360)
+    assert row["krippendorff_alpha"] == pytest.approx(2 / 3)
+
+
+@pytest.fixture
+def mixed_runs(tmp_path, codebook_path):
+    a = write_run(
+        tmp_path / "a.jsonl",
+        {
+            "S1": {"Language": 1, "Engagement1": 1, "Engagement2": 3, "Main_Findings": "Trust falls."},
+            "S2": {"Language": 1, "Engagement1": 1, "Engagement2": 2, "Main_Findings": "Same text."},
+        },
+    )
+    b = write_run(
+        tmp_path / "b.jsonl",
+        {
+            "S1": {"Language": 1, "Engagement_1": 3, "Engagement_2": 1, "Main_Findings": "Trust rises."},
+            "S2": {"Language": 2, "Engagement1": 1, "Main_Findings": "Same  text."},
+        },
+    )
+    return load_runs([a, b], codebook_path=codebook_path)
+
+
+def test_multi_select_family_as_sets(mixed_runs):
+    report = agreement_report(mixed_runs)
+    row = metrics(report, "multi_select", "Engagement")
+    assert row["n_studies"] == 2
+    # S1: {1,3} vs {3,1} -> 1; S2: {1,2} vs {1} -> 1/2
+    assert row["jaccard"] == pytest.approx(0.75)
+    assert row["pct_identical"] == pytest.approx(50)
+
+    indicators = report["agreement"].set_index("variable")
+    assert {"Engagement=1", "Engagement=2", "Engagement=3"} <= set(indicators.index)
+    assert indicators.loc["Engagement=1", "pct_agreement"] == pytest.approx(100)
+    assert indicators.loc["Engagement=2", "pct_agreement"] == pytest.approx(50)
+    assert "Engagement1" not in indicators.index
+
+
+def test_family_order_does_not_matter(mixed_runs):
+    cells = collapse_families(mixed_runs.codes)
+    s1 = cells[(cells["study_id"] == "S1") & (cells["variable"] == "Engagement")]
+    assert sorted(s1["code"]) == ["1;3", "1;3"]
+
+    disagreements = agreement_report(mixed_runs)["disagreements"]
+    assert set(zip(disagreements["study_id"], disagreements["variable"])) == {
+        ("S2", "Language"),
+        ("S2", "Engagement"),
+    }
+    row = disagreements[disagreements["variable"] == "Engagement"].iloc[0]
+    assert (row["a"], row["b"]) == ("1;2", "1")
+
+
+def test_text_variables_only_in_text_sheet(mixed_runs):
+    report = agreement_report(mixed_runs)
+    assert "Main_Findings" not in set(report["disagreements"]["variable"])
+    assert "Main_Findings" not in set(report["agreement"]["variable"])
+    # Espaços repetidos não contam como diferença
+    assert metrics(report, "text", "Main_Findings")["pct_exact_match"] == pytest.approx(50)
+
+
+def test_unknown_variables_reported(tmp_path, codebook_path):
+    path = write_run(tmp_path / "a.jsonl", {"S1": {"Language": 1, "Made_Up": 1}})
+    coded = load_runs([path], codebook_path=codebook_path)
+    assert coded.unknown_variables.to_dict() == {"Made_Up": 1}
+    assert set(coded.codes["variable"]) == {"Language"}
+
+
+def test_same_file_name_in_different_folders(tmp_path, codebook_path):
+    paths = [
+        write_run(tmp_path / folder / "llm_outputs.jsonl", {"S1": {"Language": 1}})
+        for folder in ("processed", "backup")
+    ]
+    assert load_runs(paths, codebook_path=codebook_path).runs == (
+        "processed/llm_outputs",
+        "backup/llm_outputs",
+    )
+    with pytest.raises(ValueError):
+        load_runs(paths, names=["only-one"], codebook_path=codebook_path)
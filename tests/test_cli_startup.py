@@ -0,0 +1,85 @@
+"""
+Regressão de arranque da CLI: ``--help`` não pode carregar módulos pesados.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from ro_papers import HEAVY_MODULES, SUBCOMMANDS, build_parser  # noqa: E402
+
+
+def run_cli(*args: str) -> tuple[subprocess.CompletedProcess, set[str]]:
+    """Executa ro_papers.py num interpretador novo e devolve os módulos importados."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ROOT / "ro_papers.py"), *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    imported = {
+        line.rsplit("|", 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+    return result, imported
+
+
+def heavy(imported: set[str]) -> list[str]:
+    return sorted(
+        name for name in imported if any(name == m or name.startswith(f"{m}.") for m in HEAVY_MODULES)
+    )
+
+
+def test_all_subcommands_covered():
+    assert {"ingest", "code", "recode", "compile", "agreement", "validate", "models", "bench"} <= set(
+        SUBCOMMANDS
+    )
+
+
+# Argumentos mínimos obrigatórios de cada subcomando
+REQUIRED_ARGS = {"recode": ["-s", "S1"], "agreement": ["run.jsonl"]}
+
+
+@pytest.mark.parametrize("name", SUBCOMMANDS)
+def test_subcommands_have_handlers(name):
+    args = build_parser().parse_args([name, *REQUIRED_ARGS.get(name, [])])
+    assert args.func.__name__ == f"cmd_{name}"
+
+
+@pytest.mark.parametrize("args", [(), *[(name,) for name in SUBCOMMANDS]], ids=lambda a: " ".join(a) or "top")
+def test_help_does_not_import_heavy_modules(args):
+    result, imported = run_cli(*args, "--help")
+    assert result.returncode == 0, result.stderr
+    prog = " ".join(("ro-papers", *args))
+    assert result.stdout.startswith(f"usage: {prog} ")
+    assert heavy(imported) == []
+
+
+def test_startup_overhead():
+    def elapsed(cmd: list[str]) -> float:
+        runs = []
+        for _ in range(3):
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=ROOT, capture_output=True, check=True)
+            runs.append(time.perf_counter() - start)
+        return min(runs)
+
+    baseline = elapsed([sys.executable, "-c", "pass"])
+    startup = elapsed([sys.executable, str(ROOT / "ro_papers.py"), "--help"])
+    assert startup - baseline < 0.5
+
+
+@pytest.mark.parametrize("repeat", ["0", "-1", "x"])
+def test_bench_rejects_invalid_repeat(repeat):
+    with pytest.raises(SystemExit) as exc:
+        build_parser().parse_args(["bench", "-r", repeat])
+    assert exc.value.code == 2
@@ -0,0 +1,254 @@
+"""
+Parser do codebook e validação dos outputs contra o schema compilado.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from codebook import (  # noqa: E402
+    Violation,
+    load_codebook,
+    normalize_variable,
+    parse_codebook,
+    resolve_variables,
+    validate_file,
+    validate_records,
+)
+
+CODEBOOK = """\
+Variable Name
+Values and Labels / Description
+Study_ID
+Unique alphanumeric identifier assigned to
+each study (e.g., SLR001).
+Coder_Initials
+Initials of the coder responsible for data
+extraction:
+
+AM= Ana Matias
+RO= Rui Oliveira
+Year_Publication
+Year when the publication was published
+(numeric).
+Type_Publication
+(Single selection)
+
+1 = Article
+2 = Report
+Type_Publication/Study
+(Single selection)
+
+1 = Empirical
+2 = Theoretical
+
+Note: Empirical articles are those with clearly established data
+collection procedures.
+Research_Questions1
+Research_Questions2…
+As stated by the authors.
+
+Note: Use 99='Not reported' if not present
+or 98= 'Unclear' if ambiguous.
+Engagement1
+Engagement2…
+Forms of citizen behavior toward
+parliaments examined in the study?
+
+(Multiple selection)
+
+0 = None
+1 = Petitioning (signing/submitting
+petitions to parliament)
+2 = Sub-
+national hearings
+3 = Other – specify in the notes
+98 = Unclear.
+
+7
+Standard values/labels to use across all variables:
+To ensure inter-coder consistency, always use the following terms when applicable:
+99 = Not Reported – If the information is missing or not discussed.
+98 = Unclear – If the information is presented ambiguously.
+97= Not Applicable – If the variable does not apply to the specific study.
+"""
+
+
+@pytest.fixture
+def codebook_path(tmp_path: Path) -> Path:
+    path = tmp_path / "codebook.txt"
+    path.write_text(CODEBOOK, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def variables() -> dict:
+    return {v.name: v for v in parse_codebook(CODEBOOK).variables}
+
+
+def test_variables_and_kinds(variables):
+    assert list(variables) == [
+        "Study_ID",
+        "Coder_Initials",
+        "Year_Publication",
+        "Type_Publication",
+        "Type_Publication/Study",
+        "Research_Questions",
+        "Engagement",
+    ]
+    assert variables["Study_ID"].kind == "text"
+    assert variables["Year_Publication"].kind == "numeric"
+    assert variables["Coder_Initials"].codes == {"AM": "Ana Matias", "RO": "Rui Oliveira"}
+    assert variables["Type_Publication/Study"].codes == {"1": "Empirical", "2": "Theoretical"}
+
+
+def test_numbered_families(variables):
+    family = variables["Engagement"]
+    assert family.multiple and family.kind == "categorical"
+    # Uma família de texto: as notas com 99/98 não viram códigos
+    questions = variables["Research_Questions"]
+    assert questions.multiple and questions.kind == "text" and questions.codes == {}
+
+
+def test_labels_continue_on_next_lines(variables):
+    codes = variables["Engagement"].codes
+    assert codes["1"] == "Petitioning (signing/submitting petitions to parliament)"
+    assert codes["2"] == "Sub-national hearings"
+    assert codes["3"] == "Other"  # a descrição após " – " não faz parte do label
+
+
+def test_standard_values_section(variables):
+    codebook = parse_codebook(CODEBOOK)
+    assert codebook.special_codes == {
+        "99": "Not Reported",
+        "98": "Unclear",
+        "97": "Not Applicable",
+    }
+    # Os códigos padrão repetidos numa variável não ficam entre os seus códigos próprios
+    assert set(variables["Engagement"].codes) == {"0", "1", "2", "3"}
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ("Type_Publication/Study", "Type_Publication_Study"),
+        ("Engagement_2", "Engagement2"),
+        ("  Engagement2… ", "Engagement2"),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalize_variable(raw, expected):
+    assert normalize_variable(raw) == expected
+
+
+def test_resolve_variables(codebook_path):
+    resolved = resolve_variables(
+        ["Type_Publication/Study", "Type_Publication_Study", "Type_Publication", "Engagement_3",
+         "Engagement", "Made_Up"],
+        codebook_path,
+    )
+    assert resolved["Type_Publication/Study"][0] == "Type_Publication/Study"
+    assert resolved["Type_Publication_Study"][0] == "Type_Publication/Study"
+    assert resolved["Type_Publication"][0] == "Type_Publication"
+    assert resolved["Engagement_3"][0] == "Engagement3"
+    assert resolved["Engagement"][0] == "Engagement"
+    assert resolved["Made_Up"] is None
+
+
+def complete_record(study_id: str = "SLR001") -> dict:
+    return {
+        "study_id": study_id,
+        "codes": [
+            {"variable": "Coder_Initials", "code": "RO"},
+            {"variable": "Year_Publication", "code": 2019},
+            {"variable": "Type_Publication", "code": 1},
+            {"variable": "Type_Publication_Study", "code": "2"},
+            {"variable": "Research_Questions1", "code": "How is trust measured?"},
+            {"variable": "Engagement1", "code": 1},
+            {"variable": "Engagement2", "code": 99},
+        ],
+    }
+
+
+def test_valid_record_has_no_violations(codebook_path):
+    assert validate_records([complete_record()], codebook_path) == []
+
+
+def test_violation_kinds(codebook_path):
+    record = complete_record()
+    record["codes"] += [
+        {"variable": "Made_Up", "code": 1},
+        {"variable": "Type_Publication", "code": 2},
+        {"variable": "Engagement1", "code": 9},
+        {"variable": "Year_Publication", "code": "around 2019"},
+        {"variable": "Coder_Initials", "code": "  "},
+    ]
+    record["codes"].remove({"variable": "Type_Publication_Study", "code": "2"})
+    assert validate_records([record], codebook_path) == [
+        Violation("SLR001", "Made_Up", "unknown_variable", "1"),
+        Violation("SLR001", "Type_Publication", "duplicate_variable", "2"),
+        Violation("SLR001", "Engagement1", "duplicate_variable", "9"),
+        Violation("SLR001", "Engagement1", "invalid_code", "9"),
+        Violation("SLR001", "Year_Publication", "duplicate_variable", "around 2019"),
+        Violation("SLR001", "Year_Publication", "invalid_code", "around 2019"),
+        Violation("SLR001", "Coder_Initials", "duplicate_variable"),
+        Violation("SLR001", "Coder_Initials", "empty_code"),
+        Violation("SLR001", "Type_Publication/Study", "missing_variable"),
+    ]
+
+
+def test_study_id_comes_from_the_record(codebook_path):
+    record = complete_record()
+    del record["study_id"]
+    missing = [v for v in validate_records([record], codebook_path) if v.kind == "missing_variable"]
+    assert missing == [Violation("?", "Study_ID", "missing_variable")]
+
+
+def test_invalid_records(codebook_path):
+    records = [
+        {"study_id": "S1", "codes": "not a list"},
+        {"study_id": "S2", "codes": [3]},
+    ]
+    invalid = [v for v in validate_records(records, codebook_path) if v.kind == "invalid_record"]
+    assert invalid == [
+        Violation("S1", "codes", "invalid_record", "str"),
+        Violation("S2", "codes", "invalid_record", "3"),
+    ]
+
+
+def test_invalid_json_lines_do_not_abort(tmp_path, codebook_path):
+    path = tmp_path / "outputs.jsonl"
+    path.write_text(
+        "\n".join(["{broken", "[1, 2]", json.dumps(complete_record("SLR002")), ""]),
+        encoding="utf-8",
+    )
+    violations = validate_file(path, codebook_path)
+    assert [(v.study_id, v.kind) for v in violations] == [
+        ("linha 1", "invalid_json"),
+        ("linha 2", "invalid_json"),
+    ]
+
+
+def test_project_codebook():
+    """O ``prompts/codebook.txt`` do projeto continua a ser lido como esperado."""
+    codebook = load_codebook(ROOT / "prompts" / "codebook.txt")
+    variables = {v.name: v for v in codebook.variables}
+    assert set(codebook.special_codes) == {"97", "98", "99"}
+    assert len(variables) == 22
+    assert variables["Year_Publication"].kind == "numeric"
+    assert variables["Type_Publication/Study"].codes == {"1": "Empirical", "2": "Theoretical"}
+    multiple = {name for name, v in variables.items() if v.multiple}
+    assert {"Research_Questions", "Behavioral_Engagement", "Attitudinal_Engagement",
+            "Research_Design", "Data_Collection_Techniques", "Data_Analysis"} <= multiple
+    assert variables["Behavioral_Engagement"].codes["3"] == (
+        "Voting in parliamentary elections "
+        "(when explicitly linked to parliamentary representation)"
+    )
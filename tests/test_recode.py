@@ -0,0 +1,79 @@
+"""
+``keep_latest_outputs`` e ``ensure_trailing_newline``: escrita dos outputs no ``recode``.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "src"))
+
+from llm_codec import ensure_trailing_newline  # noqa: E402
+from ro_papers import keep_latest_outputs  # noqa: E402
+
+
+def write_lines(path: Path, records: list[dict]) -> None:
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def read_lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_keeps_latest_record_per_study(tmp_path):
+    path = tmp_path / "llm_outputs.jsonl"
+    write_lines(
+        path,
+        [
+            {"study_id": "S1", "codes": [], "run": 1},
+            {"study_id": "S2", "codes": [], "run": 1},
+            {"study_id": "S1", "codes": [], "run": 2},
+        ],
+    )
+    keep_latest_outputs(path)
+    assert read_lines(path) == [
+        {"study_id": "S1", "codes": [], "run": 2},
+        {"study_id": "S2", "codes": [], "run": 1},
+    ]
+
+
+def test_records_without_study_id_are_kept_in_place(tmp_path):
+    path = tmp_path / "llm_outputs.jsonl"
+    records = [
+        {"codes": [], "n": 1},
+        {"study_id": "S1", "codes": [], "n": 2},
+        {"codes": [], "n": 3},
+        {"study_id": "", "codes": [], "n": 4},
+        {"study_id": "S1", "codes": [], "n": 5},
+    ]
+    write_lines(path, records)
+    keep_latest_outputs(path)
+    assert [r["n"] for r in read_lines(path)] == [1, 5, 3, 4]
+
+
+@pytest.mark.parametrize("bad", ["{not json", "[1, 2]"])
+def test_invalid_line_leaves_file_untouched(tmp_path, bad):
+    path = tmp_path / "llm_outputs.jsonl"
+    content = json.dumps({"study_id": "S1"}) + "\n" + bad + "\n"
+    path.write_text(content, encoding="utf-8")
+    with pytest.raises(ValueError, match=":2:"):
+        keep_latest_outputs(path)
+    assert path.read_text(encoding="utf-8") == content
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [("", ""), ('{"a": 1}', '{"a": 1}\n'), ('{"a": 1}\n', '{"a": 1}\n')],
+)
+def test_ensure_trailing_newline(tmp_path, content, expected):
+    path = tmp_path / "llm_outputs.jsonl"
+    path.write_text(content, encoding="utf-8")
+    ensure_trailing_newline(path)
+    assert path.read_text(encoding="utf-8") == expected